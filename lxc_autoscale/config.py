@@ -46,9 +46,13 @@ RESERVE_CPU_PERCENT = int(get_config_value('DEFAULT', 'reserve_cpu_percent', 10)
 RESERVE_MEMORY_MB = int(get_config_value('DEFAULT', 'reserve_memory_mb', 2048))
 OFF_PEAK_START = int(get_config_value('DEFAULT', 'off_peak_start', 22))
 OFF_PEAK_END = int(get_config_value('DEFAULT', 'off_peak_end', 6))
-IGNORE_LXC = set(map(str, get_config_value('DEFAULT', 'ignore_lxc', [])))
+IGNORE_LXC = frozenset(map(str, get_config_value('DEFAULT', 'ignore_lxc', [])))
 BEHAVIOUR = get_config_value('DEFAULT', 'behaviour', 'normal').lower()
 PROXMOX_HOSTNAME = gethostname()
+# Clamped to at least 1: zero workers, sessions or seconds would stall collection
+MAX_WORKERS = max(1, int(get_config_value('DEFAULT', 'max_workers', 32)))
+COLLECT_TIMEOUT = max(1, int(get_config_value('DEFAULT', 'collect_timeout', 120)))
+SSH_MAX_SESSIONS = max(1, int(get_config_value('DEFAULT', 'ssh_max_sessions', 10)))
 
 # LXC tier configurations
 LXC_TIER_ASSOCIATIONS = {}
@@ -72,5 +76,6 @@ __all__ = [
     'CONFIG_FILE', 'DEFAULTS', 'LOG_FILE', 'LOCK_FILE', 'BACKUP_DIR',
     'RESERVE_CPU_PERCENT', 'RESERVE_MEMORY_MB', 'OFF_PEAK_START',
     'OFF_PEAK_END', 'IGNORE_LXC', 'BEHAVIOUR', 'PROXMOX_HOSTNAME',
+    'MAX_WORKERS', 'COLLECT_TIMEOUT', 'SSH_MAX_SESSIONS',
     'get_config_value', 'HORIZONTAL_SCALING_GROUPS', 'LXC_TIER_ASSOCIATIONS'
 ]
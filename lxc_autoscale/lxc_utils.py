@@ -1,23 +1,110 @@
 """Utility functions for LXC container management and monitoring."""
 
+import asyncio
+import atexit
+import functools
 import json
 import logging
 import os
+import select
+import shlex
+import signal
 import subprocess
+import tempfile
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import uuid
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime
-from threading import Lock
+from threading import Condition, Lock, Thread
 
 try:
     import paramiko
 except ImportError:
     logging.error("Paramiko package not installed. SSH functionality disabled.")
 
-from config import (BACKUP_DIR, DEFAULTS, IGNORE_LXC, LOG_FILE, LXC_TIER_ASSOCIATIONS,
-                   PROXMOX_HOSTNAME, config)
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from config import (BACKUP_DIR, COLLECT_TIMEOUT, DEFAULTS, IGNORE_LXC, LOG_FILE,
+                   LXC_TIER_ASSOCIATIONS, MAX_WORKERS, PROXMOX_HOSTNAME,
+                   SSH_MAX_SESSIONS, config)
+
+SSH_KEEPALIVE_SECONDS = 30
+SSH_RECV_SIZE = 32768
+SNAPSHOT_SEPARATOR = '---'
+CPU_SAMPLE_MIN_INTERVAL = 2
+JSON_LOG_FLUSH_INTERVAL = 0.05
+JSON_LOG_MAX_PENDING = 64
+TOTALS_CACHE_TTL = 30
+CONTAINERS_CACHE_TTL = 5
+CGROUP_LXC_ROOT = '/sys/fs/cgroup/lxc'
+NUMPY_SORT_THRESHOLD = 64
+
+try:
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+except OSError as e:
+    logging.error("Failed to create backup directory %s: %s", BACKUP_DIR, str(e))
 
-lock = Lock()
+# Container status from the last `pct list`: ctid -> status
+_running_cache = {}
+
+# Hash of the settings last written to each container's backup file
+_last_backup_hash = {}
+
+# Last /proc/stat sample per container: ctid -> (total, idle, monotonic timestamp)
+_cpu_prev = {}
+
+# Last cgroup CPU sample per container: ctid -> (usage_usec, monotonic timestamp)
+_cgroup_cpu_prev = {}
+
+
+def _json_dumps(data):
+    """Serialise data to UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
+
+def _ttl_cache(seconds):
+    """Memoise a function's result per positional arguments for `seconds`."""
+    def decorator(func):
+        cache = {}
+        cache_lock = Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            now = time.monotonic()
+            with cache_lock:
+                entry = cache.get(args)
+                if entry and entry[1] > now:
+                    return entry[0]
+            value = func(*args)
+            with cache_lock:
+                cache[args] = (value, now + seconds)
+            return value
+
+        def cache_clear():
+            with cache_lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
 
 
 def run_command(cmd, timeout=30):
@@ -27,8 +114,144 @@ def run_command(cmd, timeout=30):
     return (run_remote_command if use_remote_proxmox else run_local_command)(cmd, timeout)
 
 
+def _kill_shell(process):
+    """Kill a shell together with anything it is still running."""
+    if process.poll() is None:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    process.wait()
+    for stream in (process.stdin, process.stdout):
+        stream.close()
+
+
+class _LocalShell:
+    """A long-lived bash process that runs commands delimited by a sentinel line."""
+
+    def __init__(self):
+        self._marker = f"__END_{uuid.uuid4().hex}__"
+        self._process = subprocess.Popen(  # pylint: disable=consider-using-with
+            ['bash', '--noprofile', '--norc'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            bufsize=0, start_new_session=True
+        )
+        # Runs once: on close(), when the shell is garbage collected, or at exit
+        self._finalizer = weakref.finalize(self, _kill_shell, self._process)
+
+    def alive(self):
+        """Return True while the shell process is running."""
+        return self._process.poll() is None
+
+    def send(self, cmd):
+        """Queue cmd followed by a sentinel that carries its exit status."""
+        # The subshell keeps cd, variables, set options and exit from leaking into the shell
+        script = (
+            f"( eval {shlex.quote(cmd)} ) < /dev/null 2>&1\n"
+            f"printf '\\n{self._marker} %d\\n' \"$?\"\n"
+        )
+        self._process.stdin.write(script.encode('utf-8'))
+
+    def receive(self, cmd, timeout):
+        """Read output up to the sentinel and return (exit status, output)."""
+        fd = self._process.stdout.fileno()
+        marker = f"\n{self._marker} ".encode('utf-8')
+        buffer = b''
+        deadline = time.monotonic() + timeout
+        while True:
+            pos = buffer.find(marker)
+            if pos != -1 and buffer.endswith(b'\n'):
+                returncode = int(buffer[pos + len(marker):])
+                return returncode, buffer[:pos].decode('utf-8').strip()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.close()
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if ready:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    self.close()
+                    raise RuntimeError("shell exited before the command completed")
+                buffer += chunk
+
+    def close(self):
+        """Kill the shell together with anything it is still running."""
+        self._finalizer()
+
+
+class _LocalShellPool:
+    """Keep up to size idle shells for reuse across collection threads and cycles."""
+
+    def __init__(self, size):
+        self._size = size
+        self._idle = []
+        self._lock = Lock()
+
+    def acquire(self):
+        """Return an idle live shell, or start a new one."""
+        with self._lock:
+            while self._idle:
+                shell = self._idle.pop()
+                if shell.alive():
+                    return shell
+                shell.close()
+        return _LocalShell()
+
+    def release(self, shell):
+        """Return a shell to the pool, closing it if it died or the pool is full."""
+        if shell.alive():
+            with self._lock:
+                if len(self._idle) < self._size:
+                    self._idle.append(shell)
+                    return
+        shell.close()
+
+    def close_all(self):
+        """Close every idle shell."""
+        with self._lock:
+            for shell in self._idle:
+                shell.close()
+            self._idle.clear()
+
+
+_local_shells = _LocalShellPool(MAX_WORKERS)
+atexit.register(_local_shells.close_all)
+
+
 def run_local_command(cmd, timeout=30):
-    """Execute a command locally with timeout."""
+    """Execute a command locally with timeout, reusing a pooled shell."""
+    shell = None
+    try:
+        shell = _local_shells.acquire()
+        shell.send(cmd)
+    except OSError as e:
+        logging.debug("Persistent shell unavailable (%s), spawning one for '%s'", str(e), cmd)
+        if shell is not None:
+            shell.close()
+        return _run_local_subprocess(cmd, timeout)
+
+    try:
+        returncode, result = shell.receive(cmd, timeout)
+    except subprocess.TimeoutExpired:
+        logging.error("Command '%s' timed out after %d seconds", cmd, timeout)
+        return None
+    except (OSError, RuntimeError, ValueError) as e:
+        logging.error("Unexpected error executing '%s': %s", cmd, str(e))
+        shell.close()
+        return None
+    finally:
+        _local_shells.release(shell)
+
+    if returncode != 0:
+        logging.error("Command '%s' failed: %s", cmd, result)
+        return None
+    logging.debug("Command '%s' executed successfully. Output: %s", cmd, result)
+    return result
+
+
+def _run_local_subprocess(cmd, timeout=30):
+    """Execute a command locally in a fresh shell with timeout."""
     try:
         result = subprocess.check_output(
             cmd, shell=True, timeout=timeout, stderr=subprocess.STDOUT
@@ -44,57 +267,221 @@ def run_local_command(cmd, timeout=30):
     return None
 
 
-def run_remote_command(cmd, timeout=30):
-    """Execute a command on remote Proxmox host via SSH."""
-    logging.debug("Running remote command: %s", cmd)
-    ssh = None
-    try:
+class _SSHPool:
+    """Keep one authenticated SSH client per (host, port, user) and reuse it."""
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _key():
+        defaults = config.get('DEFAULT', {})
+        return (
+            defaults.get('proxmox_host'),
+            defaults.get('ssh_port', 22),
+            defaults.get('ssh_user'),
+        )
+
+    @staticmethod
+    def _connect(key):
+        host, port, user = key
+        defaults = config.get('DEFAULT', {})
         ssh = paramiko.SSHClient()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         ssh.connect(
-            hostname=config.get('DEFAULT', {}).get('proxmox_host'),
-            port=config.get('DEFAULT', {}).get('ssh_port', 22),
-            username=config.get('DEFAULT', {}).get('ssh_user'),
-            password=config.get('DEFAULT', {}).get('ssh_password'),
-            key_filename=config.get('DEFAULT', {}).get('ssh_key_path')
+            hostname=host,
+            port=port,
+            username=user,
+            password=defaults.get('ssh_password'),
+            key_filename=defaults.get('ssh_key_path')
         )
-        _, stdout, _ = ssh.exec_command(cmd, timeout=timeout)
-        output = stdout.read().decode('utf-8').strip()
+        transport = ssh.get_transport()
+        if transport:
+            transport.set_keepalive(SSH_KEEPALIVE_SECONDS)
+        logging.debug("Opened pooled SSH connection to %s@%s:%s", user, host, port)
+        return ssh
+
+    def acquire(self):
+        """Return a live client for the configured host, reconnecting if needed."""
+        key = self._key()
+        with self._lock:
+            ssh = self._clients.get(key)
+            transport = ssh.get_transport() if ssh else None
+            if transport is None or not transport.is_active():
+                if ssh:
+                    ssh.close()
+                ssh = self._clients[key] = self._connect(key)
+            return ssh
+
+    def discard(self, ssh):
+        """Drop a client whose connection turned out to be broken."""
+        with self._lock:
+            for key, client in list(self._clients.items()):
+                if client is ssh:
+                    del self._clients[key]
+        ssh.close()
+
+    def close_all(self):
+        """Close every pooled client."""
+        with self._lock:
+            for ssh in self._clients.values():
+                ssh.close()
+            self._clients.clear()
+
+
+_ssh_pool = _SSHPool()
+atexit.register(_ssh_pool.close_all)
+
+
+@contextmanager
+def get_ssh():
+    """Yield a pooled SSH client; dead connections are dropped for a lazy reconnect."""
+    ssh = _ssh_pool.acquire()
+    try:
+        yield ssh
+    except (paramiko.SSHException, EOFError, OSError):
+        # Channel-level failures (timeouts, refused sessions) only affect this
+        # command; keep the shared client unless the transport itself is gone.
+        transport = ssh.get_transport()
+        if transport is None or not transport.is_active():
+            _ssh_pool.discard(ssh)
+        raise
+
+
+def run_remote_command(cmd, timeout=30):
+    """Execute a command on remote Proxmox host via SSH."""
+    logging.debug("Running remote command: %s", cmd)
+    try:
+        with get_ssh() as ssh:
+            _, stdout, _ = ssh.exec_command(cmd, timeout=timeout)
+            output = stdout.read().decode('utf-8').strip()
+            # -1 means the channel closed without an exit status, e.g. the connection dropped
+            if stdout.channel.recv_exit_status() == -1:
+                raise EOFError("channel closed before the command finished")
         logging.debug("Remote command '%s' executed successfully: %s", cmd, output)
         return output
     except paramiko.SSHException as e:
         logging.error("SSH execution failed: %s", str(e))
     except Exception as e:  # pylint: disable=broad-except
         logging.error("Unexpected SSH error executing '%s': %s", cmd, str(e))
-    finally:
-        if ssh:
-            ssh.close()
     return None
 
 
+def run_remote_commands(cmds, timeout=30):
+    """Run commands concurrently as channels on the pooled SSH transport."""
+    outputs = [None] * len(cmds)
+    if not cmds:
+        return outputs
+
+    pending = list(enumerate(cmds))
+    active = {}  # channel -> (index, received chunks, deadline)
+    # Keep up to SSH_MAX_SESSIONS channels in flight and drain them with select();
+    # each command gets the full timeout from the moment its channel is opened.
+    try:
+        with get_ssh() as ssh:
+            transport = ssh.get_transport()
+            while pending or active:
+                while pending and len(active) < SSH_MAX_SESSIONS:
+                    index, cmd = pending.pop(0)
+                    logging.debug("Running remote command: %s", cmd)
+                    try:
+                        channel = transport.open_session()
+                    except paramiko.ChannelException as e:
+                        logging.error("Could not open SSH channel for '%s': %s", cmd, str(e))
+                        continue
+                    channel.settimeout(timeout)
+                    channel.exec_command(cmd)
+                    active[channel] = (index, [], time.monotonic() + timeout)
+
+                now = time.monotonic()
+                for channel, (index, _, deadline) in list(active.items()):
+                    if deadline <= now:
+                        logging.error("Remote command '%s' timed out after %s seconds",
+                                      cmds[index], timeout)
+                        channel.close()
+                        del active[channel]
+                if not active:
+                    continue
+
+                remaining = min(deadline for _, _, deadline in active.values()) - now
+                readable, _, _ = select.select(list(active), [], [], max(remaining, 0))
+                for channel in readable:
+                    index, chunks, _ = active[channel]
+                    data = channel.recv(SSH_RECV_SIZE)
+                    if data:
+                        chunks.append(data)
+                        continue
+                    if channel.recv_exit_status() == -1:
+                        logging.error("Remote command '%s' lost its channel before finishing",
+                                      cmds[index])
+                    else:
+                        outputs[index] = b''.join(chunks).decode('utf-8').strip()
+                        logging.debug("Remote command '%s' executed successfully: %s",
+                                      cmds[index], outputs[index])
+                    channel.close()
+                    del active[channel]
+    except paramiko.SSHException as e:
+        logging.error("SSH execution failed: %s", str(e))
+    except Exception as e:  # pylint: disable=broad-except
+        logging.error("Unexpected SSH error running %d commands: %s", len(cmds), str(e))
+    finally:
+        for channel, (index, _, _) in active.items():
+            logging.error("Remote command '%s' was interrupted", cmds[index])
+            channel.close()
+        for _, cmd in pending:
+            logging.error("Remote command '%s' was not run", cmd)
+    return outputs
+
+
+@_ttl_cache(CONTAINERS_CACHE_TTL)
 def get_containers():
-    """Return list of container IDs, excluding ignored ones."""
-    containers = run_command("pct list | awk 'NR>1 {print $1}'")
-    return [ctid for ctid in containers.splitlines() if ctid not in IGNORE_LXC]
+    """Return {ctid: status} for all containers, excluding ignored ones."""
+    global _running_cache  # pylint: disable=global-statement
+    output = run_command("pct list")
+    statuses = {}
+    for line in output.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) >= 2:
+            statuses[fields[0]] = fields[1].lower()
+    _running_cache = statuses
+    return {ctid: status for ctid, status in statuses.items() if ctid not in IGNORE_LXC}
 
 
 def is_container_running(ctid):
     """Check if container is running."""
+    status = _running_cache.get(str(ctid))
+    if status is not None:
+        return status == "running"
     status = run_command(f"pct status {ctid}")
     return status and "status: running" in status.lower()
 
 
 def backup_container_settings(ctid, settings):
     """Backup container configuration to JSON file."""
+    settings_hash = hash(tuple(sorted(settings.items())))
+    if _last_backup_hash.get(ctid) == settings_hash:
+        logging.debug("Backup for container %s is unchanged. Skipping write.", ctid)
+        return
+    tmp_file = None
     try:
-        os.makedirs(BACKUP_DIR, exist_ok=True)
         backup_file = os.path.join(BACKUP_DIR, f"{ctid}_backup.json")
-        with lock:
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(settings, f)
+        # A unique temp file per write, renamed into place, keeps concurrent writers
+        # from clobbering each other and readers from seeing partial JSON
+        fd, tmp_file = tempfile.mkstemp(dir=BACKUP_DIR, prefix=f"{ctid}_")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_json_dumps(settings))
+        os.replace(tmp_file, backup_file)
+        tmp_file = None
+        _last_backup_hash[ctid] = settings_hash
         logging.debug("Backup saved for container %s: %s", ctid, settings)
     except Exception as e:  # pylint: disable=broad-except
         logging.error("Failed to backup settings for %s: %s", ctid, str(e))
+        if tmp_file is not None:
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
 
 
 def load_backup_settings(ctid):
@@ -102,9 +489,8 @@ def load_backup_settings(ctid):
     try:
         backup_file = os.path.join(BACKUP_DIR, f"{ctid}_backup.json")
         if os.path.exists(backup_file):
-            with lock:
-                with open(backup_file, 'r', encoding='utf-8') as f:
-                    settings = json.load(f)
+            with open(backup_file, 'r', encoding='utf-8') as f:
+                settings = json.load(f)
             logging.debug("Loaded backup for container %s: %s", ctid, settings)
             return settings
         logging.warning("No backup found for container %s", ctid)
@@ -119,27 +505,103 @@ def rollback_container_settings(ctid):
     settings = load_backup_settings(ctid)
     if settings:
         logging.info("Rolling back container %s to backup settings", ctid)
-        run_command(f"pct set {ctid} -cores {settings['cores']}")
-        run_command(f"pct set {ctid} -memory {settings['memory']}")
+        run_command(f"pct set {ctid} -cores {settings['cores']} -memory {settings['memory']}")
+
+
+class _JsonLogBuffer:
+    """Collect JSON log lines in memory and append them to disk in batches."""
+
+    def __init__(self, path):
+        self._path = path
+        self._pending = deque()
+        self._condition = Condition()
+        self._write_lock = Lock()
+        self._fd = None
+        self._thread = None
+
+    def append(self, line):
+        """Queue a line; the flusher thread writes it within JSON_LOG_FLUSH_INTERVAL."""
+        with self._condition:
+            self._pending.append(line)
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="json-log-flusher", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                self._condition.wait_for(
+                    lambda: len(self._pending) >= JSON_LOG_MAX_PENDING,
+                    timeout=JSON_LOG_FLUSH_INTERVAL
+                )
+            self.flush()
+
+    def flush(self):
+        """Write all pending lines with a single write call."""
+        with self._write_lock:
+            with self._condition:
+                lines = list(self._pending)
+                self._pending.clear()
+            if not lines:
+                return
+            data = memoryview(b'\n'.join(lines) + b'\n')
+            try:
+                if self._fd is None:
+                    self._fd = os.open(
+                        self._path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o666
+                    )
+                # O_APPEND makes each write land atomically at the end of the file
+                while data:
+                    data = data[os.write(self._fd, data):]
+            except OSError as e:
+                logging.error("Failed to write JSON log %s: %s", self._path, str(e))
+
+    def close(self):
+        """Flush pending lines and close the log file."""
+        self.flush()
+        with self._write_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+_ts_cache = (0, '')
+_json_log = _JsonLogBuffer(LOG_FILE.replace('.log', '.json'))
+atexit.register(_json_log.close)
+
+
+def _log_timestamp():
+    """Return the local time formatted once per second for JSON log events."""
+    global _ts_cache  # pylint: disable=global-statement
+    sec = int(time.time())
+    cached_sec, formatted = _ts_cache
+    if sec != cached_sec:
+        formatted = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(sec))
+        _ts_cache = (sec, formatted)
+    return formatted
 
 
 def log_json_event(ctid, action, resource_change):
     """Log container change events in JSON format."""
     log_data = {
-        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "timestamp": _log_timestamp(),
         "proxmox_host": PROXMOX_HOSTNAME,
         "container_id": ctid,
         "action": action,
         "change": resource_change
     }
-    with lock:
-        with open(LOG_FILE.replace('.log', '.json'), 'a', encoding='utf-8') as json_log_file:
-            json_log_file.write(json.dumps(log_data) + '\n')
+    _json_log.append(_json_dumps(log_data))
 
 
+@_ttl_cache(TOTALS_CACHE_TTL)
 def get_total_cores():
     """Calculate available CPU cores after reserving percentage."""
-    total_cores = int(run_command("nproc"))
+    if config.get('DEFAULT', {}).get('use_remote_proxmox', False):
+        total_cores = int(run_command("nproc"))
+    else:
+        total_cores = len(os.sched_getaffinity(0))
     reserved_cores = max(1, int(total_cores * DEFAULTS['reserve_cpu_percent'] / 100))
     available_cores = total_cores - reserved_cores
     logging.debug(
@@ -149,12 +611,17 @@ def get_total_cores():
     return available_cores
 
 
+@_ttl_cache(TOTALS_CACHE_TTL)
 def get_total_memory():
     """Calculate available memory after reserving fixed amount."""
     try:
-        command_output = run_command("free -m | awk '/^Mem:/ {print $2}'")
-        total_memory = int(command_output.strip()) if command_output else 0
-    except (ValueError, subprocess.CalledProcessError) as e:
+        if config.get('DEFAULT', {}).get('use_remote_proxmox', False):
+            meminfo = run_command("cat /proc/meminfo")
+        else:
+            with open('/proc/meminfo', 'r', encoding='utf-8') as f:
+                meminfo = f.read()
+        total_memory = _parse_meminfo(meminfo)["MemTotal"] // 1024 if meminfo else 0
+    except (OSError, ValueError, KeyError, subprocess.CalledProcessError) as e:
         logging.error("Failed to get total memory: %s", str(e))
         total_memory = 0
 
@@ -166,22 +633,273 @@ def get_total_memory():
     return available_memory
 
 
-def get_cpu_usage(ctid):
+def _split_blocks(output):
+    """Split command output into blocks delimited by SNAPSHOT_SEPARATOR lines."""
+    blocks = [[]]
+    for line in output.splitlines():
+        if line.strip() == SNAPSHOT_SEPARATOR:
+            blocks.append([])
+        else:
+            blocks[-1].append(line)
+    return ['\n'.join(block) for block in blocks]
+
+
+def _parse_key_values(text):
+    """Parse 'key: value' lines (pct config, /proc/meminfo) into a dict."""
+    return {
+        key.strip(): value.strip()
+        for key, value in (line.split(':', 1) for line in text.splitlines() if ':' in line)
+    }
+
+
+def _parse_meminfo(text):
+    """Parse /proc/meminfo content into {field: kB}."""
+    return {
+        key: int(value.split()[0])
+        for key, value in _parse_key_values(text).items()
+    }
+
+
+def _parse_cpu_times(text):
+    """Return the aggregate 'cpu' line of /proc/stat as a list of floats."""
+    for line in text.splitlines():
+        if line.startswith('cpu '):
+            return list(map(float, line.split()[1:]))
+    raise ValueError("No aggregate cpu line in /proc/stat output.")
+
+
+def _known_stopped(ctid):
+    """Whether get_containers() already listed this container as not running."""
+    status = _running_cache.get(str(ctid))
+    return status is not None and status != "running"
+
+
+def _snapshot_host_command(ctid):
+    # The status is already known when get_containers() listed this container
+    if str(ctid) in _running_cache:
+        return f"pct config {ctid}"
+    return f"pct config {ctid} && echo {SNAPSHOT_SEPARATOR} && pct status {ctid}"
+
+
+def _snapshot_guest_command(ctid):
+    sep = f"echo {SNAPSHOT_SEPARATOR}"
+    return (
+        f"pct exec {ctid} -- sh -c 'cat /proc/loadavg; {sep}; nproc; {sep}; "
+        f"cat /proc/stat; {sep}; cat /proc/meminfo'"
+    )
+
+
+def _parse_snapshot_host(ctid, host_output):
+    """Build a snapshot from `pct config` and `pct status` output."""
+    if not host_output:
+        logging.error("Failed to get config and status for %s", ctid)
+        return None
+
+    blocks = _split_blocks(host_output)
+    if len(blocks) > 1:
+        running = "status: running" in blocks[1].lower()
+    else:
+        running = is_container_running(ctid)
+    return {
+        "config": _parse_key_values(blocks[0]),
+        "running": bool(running),
+    }
+
+
+def _parse_snapshot_guest(ctid, snapshot, guest_output):
+    """Add the in-container metrics to a snapshot."""
+    if not guest_output:
+        logging.error("Failed to get usage metrics for %s", ctid)
+        return
+
+    try:
+        loadavg, nproc, cpu_stat, meminfo = _split_blocks(guest_output)[:4]
+        snapshot["loadavg"] = float(loadavg.split()[0])
+        snapshot["nproc"] = int(nproc.strip())
+        snapshot["cpu_times"] = _parse_cpu_times(cpu_stat)
+        snapshot["meminfo"] = _parse_meminfo(meminfo)
+    except (ValueError, IndexError) as e:
+        logging.error("Failed to parse usage metrics for %s: %s", ctid, str(e))
+
+
+def _read_cgroup_stats(ctid):
+    """Read CPU and memory counters from the container's cgroup v2 directory."""
+    path = os.path.join(CGROUP_LXC_ROOT, str(ctid))
+    try:
+        with open(os.path.join(path, 'cpu.stat'), 'r', encoding='utf-8') as f:
+            cpu_stat = dict(line.split() for line in f if line.strip())
+        with open(os.path.join(path, 'memory.current'), 'r', encoding='utf-8') as f:
+            mem_current = int(f.read())
+        with open(os.path.join(path, 'memory.max'), 'r', encoding='utf-8') as f:
+            mem_max = f.read().strip()
+        with open(os.path.join(path, 'memory.stat'), 'r', encoding='utf-8') as f:
+            mem_stat = dict(line.split() for line in f if line.strip())
+        return {
+            "usage_usec": int(cpu_stat['usage_usec']),
+            "time": time.monotonic(),
+            # Exclude reclaimable page cache, as MemAvailable does inside the container
+            "mem_used": mem_current - int(mem_stat.get('inactive_file', 0)),
+            "mem_limit": None if mem_max == 'max' else int(mem_max),
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _cgroup_cpu_percent(ctid, stats, cores):
+    """Return CPU usage from the delta against the previous cgroup sample, if usable."""
+    previous = _cgroup_cpu_prev.get(ctid)
+    if previous is not None and stats["time"] - previous[1] < CPU_SAMPLE_MIN_INTERVAL:
+        return None
+    _cgroup_cpu_prev[ctid] = (stats["usage_usec"], stats["time"])
+    if previous is None or cores <= 0:
+        return None
+    wall_usec = (stats["time"] - previous[1]) * 1_000_000
+    usage = 100.0 * (stats["usage_usec"] - previous[0]) / (wall_usec * cores)
+    return round(max(min(usage, 100.0), 0.0), 2)
+
+
+def _apply_cgroup_stats(ctid, snapshot):
+    """Fill in usage straight from the local cgroup; False if pct exec is still needed."""
+    if config.get('DEFAULT', {}).get('use_remote_proxmox', False):
+        return False
+    stats = _read_cgroup_stats(ctid)
+    if not stats or not stats["mem_limit"]:
+        return False
+    cores = snapshot["config"].get('cores', '')
+    cores = int(cores) if cores.isdigit() else (os.cpu_count() or 1)
+    cpu = _cgroup_cpu_percent(ctid, stats, cores)
+    if cpu is None:
+        return False
+    snapshot["cgroup_cpu"] = cpu
+    snapshot["cgroup_mem"] = (stats["mem_used"] * 100) / stats["mem_limit"]
+    return True
+
+
+def _is_complete(snapshot):
+    """Whether a running container's snapshot holds usage metrics."""
+    return not snapshot["running"] or "cgroup_mem" in snapshot or "meminfo" in snapshot
+
+
+def get_container_snapshot(ctid):
+    """Fetch container config, status and in-container metrics in two commands."""
+    if _known_stopped(ctid):
+        return None
+    snapshot = _parse_snapshot_host(ctid, run_command(_snapshot_host_command(ctid)))
+    if snapshot and snapshot["running"] and not _apply_cgroup_stats(ctid, snapshot):
+        _parse_snapshot_guest(ctid, snapshot, run_command(_snapshot_guest_command(ctid)))
+    return snapshot
+
+
+async def _fetch_snapshots_async(ctids, timeout=30):
+    """Fetch snapshots for all containers concurrently on one asyncio event loop."""
+    defaults = config.get('DEFAULT', {})
+    remote = defaults.get('use_remote_proxmox', False)
+    conn = None
+    if remote:
+        options = {}
+        if defaults.get('ssh_key_path'):
+            options['client_keys'] = [defaults['ssh_key_path']]
+        conn = await asyncssh.connect(
+            defaults.get('proxmox_host'),
+            port=defaults.get('ssh_port', 22),
+            username=defaults.get('ssh_user'),
+            password=defaults.get('ssh_password'),
+            known_hosts=None,
+            **options
+        )
+    semaphore = asyncio.Semaphore(SSH_MAX_SESSIONS if remote else MAX_WORKERS)
+
+    async def run(cmd):
+        async with semaphore:
+            try:
+                if conn:
+                    result = await asyncio.wait_for(conn.run(cmd, check=False), timeout)
+                    return result.stdout.strip()
+                proc = await asyncio.create_subprocess_shell(
+                    cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+                )
+                try:
+                    output, _ = await asyncio.wait_for(proc.communicate(), timeout)
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+                    raise
+                if proc.returncode != 0:
+                    logging.error("Command '%s' failed: %s", cmd, output.decode('utf-8'))
+                    return None
+                return output.decode('utf-8').strip()
+            except asyncio.TimeoutError:
+                logging.error("Command '%s' timed out after %d seconds", cmd, timeout)
+            except Exception as e:  # pylint: disable=broad-except
+                logging.error("Unexpected error executing '%s': %s", cmd, str(e))
+            return None
+
+    async def probe(ctid):
+        if _known_stopped(ctid):
+            return None
+        snapshot = _parse_snapshot_host(ctid, await run(_snapshot_host_command(ctid)))
+        if snapshot and snapshot["running"] and not _apply_cgroup_stats(ctid, snapshot):
+            _parse_snapshot_guest(ctid, snapshot, await run(_snapshot_guest_command(ctid)))
+        return snapshot
+
+    try:
+        results = await asyncio.gather(*(probe(ctid) for ctid in ctids))
+    finally:
+        if conn:
+            conn.close()
+            await conn.wait_closed()
+    # Incomplete snapshots are left out so callers fetch them again one by one
+    return {ctid: snapshot for ctid, snapshot in zip(ctids, results)
+            if snapshot and _is_complete(snapshot)}
+
+
+def prefetch_container_snapshots(ctids):
+    """Fetch snapshots up front with asyncio or SSH channels; empty dict otherwise."""
+    ctids = list(ctids)
+    defaults = config.get('DEFAULT', {})
+    remote = defaults.get('use_remote_proxmox', False)
+    if defaults.get('use_asyncio', False):
+        if remote and asyncssh is None:
+            logging.warning("use_asyncio requires the asyncssh package. Using threads.")
+        else:
+            try:
+                return asyncio.run(_fetch_snapshots_async(ctids))
+            except Exception as e:  # pylint: disable=broad-except
+                logging.error("Asynchronous data collection failed: %s", str(e))
+                return {}
+
+    if not remote:
+        return {}
+
+    # Stopped containers need no config; get_container_data() skips them anyway
+    ctids = [ctid for ctid in ctids if not _known_stopped(ctid)]
+    snapshots = {}
+    host_outputs = run_remote_commands([_snapshot_host_command(ctid) for ctid in ctids])
+    for ctid, output in zip(ctids, host_outputs):
+        snapshot = _parse_snapshot_host(ctid, output)
+        if snapshot:
+            snapshots[ctid] = snapshot
+
+    running = [ctid for ctid, snapshot in snapshots.items() if snapshot["running"]]
+    guest_outputs = run_remote_commands([_snapshot_guest_command(ctid) for ctid in running])
+    for ctid, output in zip(running, guest_outputs):
+        _parse_snapshot_guest(ctid, snapshots[ctid], output)
+    # Incomplete snapshots are left out so callers fetch them again one by one
+    return {ctid: snapshot for ctid, snapshot in snapshots.items() if _is_complete(snapshot)}
+
+
+def get_cpu_usage(ctid, snapshot=None):
     """Get container CPU usage using multiple fallback methods."""
-    def run_cmd(command):
-        try:
-            result = subprocess.run(
-                command, shell=True, capture_output=True, text=True, check=True
-            )
-            return result.stdout.strip()
-        except subprocess.CalledProcessError as e:
-            logging.warning("Command failed: %s, Error: %s", command, str(e))
-            return ""
+    if snapshot is None:
+        snapshot = get_container_snapshot(ctid) or {}
+    if "cgroup_cpu" in snapshot:
+        logging.info("CPU usage for %s using cgroup: %s%%", ctid, snapshot["cgroup_cpu"])
+        return snapshot["cgroup_cpu"]
 
     def loadavg_method(ctid):
         try:
-            loadavg = float(run_cmd(f"pct exec {ctid} -- cat /proc/loadavg").split()[0])
-            num_cpus = int(run_cmd(f"pct exec {ctid} -- nproc"))
+            loadavg = snapshot["loadavg"]
+            num_cpus = snapshot["nproc"]
             if num_cpus == 0:
                 raise ValueError("Number of CPUs is zero.")
             return round(min((loadavg / num_cpus) * 100, 100.0), 2)
@@ -190,21 +908,27 @@ def get_cpu_usage(ctid):
 
     def load_method(ctid):
         try:
-            cmd = f"pct exec {ctid} -- cat /proc/stat | grep '^cpu '"
-            initial_times = list(map(float, run_cmd(cmd).split()[1:]))
-            initial_total = sum(initial_times)
-            initial_idle = initial_times[3]
-
-            time.sleep(1)
-
-            new_times = list(map(float, run_cmd(cmd).split()[1:]))
+            new_times = snapshot.get("cpu_times")
+            if not new_times:
+                output = run_command(f"pct exec {ctid} -- cat /proc/stat") or ""
+                new_times = _parse_cpu_times(output)
             new_total = sum(new_times)
             new_idle = new_times[3]
+            now = time.monotonic()
+
+            previous = _cpu_prev.get(ctid)
+            if previous is None:
+                _cpu_prev[ctid] = (new_total, new_idle, now)
+                raise ValueError("No previous CPU sample yet.")
+            initial_total, initial_idle, initial_ts = previous
+            if now - initial_ts < CPU_SAMPLE_MIN_INTERVAL:
+                raise ValueError("Previous CPU sample is too recent.")
+            _cpu_prev[ctid] = (new_total, new_idle, now)
 
             total_diff = new_total - initial_total
             idle_diff = new_idle - initial_idle
 
-            if total_diff == 0:
+            if total_diff <= 0:
                 raise ValueError("Total CPU time did not change.")
 
             return round(
@@ -214,8 +938,8 @@ def get_cpu_usage(ctid):
             raise RuntimeError("Load method failed: %s", str(e)) from e
 
     methods = [
-        ("Load Average", loadavg_method),
         ("Load", load_method),
+        ("Load Average", loadavg_method),
     ]
 
     for method_name, method in methods:
@@ -231,18 +955,29 @@ def get_cpu_usage(ctid):
     return 0.0
 
 
-def get_memory_usage(ctid):
+def get_memory_usage(ctid, snapshot=None):
     """Get container memory usage percentage."""
-    mem_info = run_command(
-        f"pct exec {ctid} -- awk '/MemTotal/ {{t=$2}} /MemAvailable/ {{a=$2}} "
-        f"END {{print t, t-a}}' /proc/meminfo"
-    )
-    if mem_info:
+    if snapshot is None and not config.get('DEFAULT', {}).get('use_remote_proxmox', False):
+        stats = _read_cgroup_stats(ctid)
+        if stats and stats["mem_limit"]:
+            return (stats["mem_used"] * 100) / stats["mem_limit"]
+    if snapshot is not None and "cgroup_mem" in snapshot:
+        return snapshot["cgroup_mem"]
+    meminfo = snapshot.get("meminfo") if snapshot is not None else None
+    if meminfo is None:
+        output = run_command(f"pct exec {ctid} -- cat /proc/meminfo")
+        try:
+            meminfo = _parse_meminfo(output) if output else None
+        except (ValueError, IndexError):
+            logging.error("Failed to parse memory info for %s: '%s'", ctid, output)
+            meminfo = None
+    if meminfo:
         try:
-            total, used = map(int, mem_info.split())
+            total = meminfo["MemTotal"]
+            used = total - meminfo["MemAvailable"]
             return (used * 100) / total
-        except ValueError:
-            logging.error("Failed to parse memory info for %s: '%s'", ctid, mem_info)
+        except (KeyError, ZeroDivisionError):
+            logging.error("Failed to parse memory info for %s: '%s'", ctid, meminfo)
     logging.error("Failed to get memory usage for %s", ctid)
     return 0.0
 
@@ -252,20 +987,25 @@ def is_ignored(ctid):
     return str(ctid) in IGNORE_LXC
 
 
-def get_container_data(ctid):
+def get_container_data(ctid, snapshot=None):
     """Collect container resource usage data."""
-    if is_ignored(ctid) or not is_container_running(ctid):
+    if is_ignored(ctid):
+        return None
+
+    if snapshot is None:
+        snapshot = get_container_snapshot(ctid)
+    if not snapshot or not snapshot["running"]:
         return None
 
     logging.debug("Collecting data for container %s", ctid)
     try:
-        cores = int(run_command(f"pct config {ctid} | grep cores | awk '{{print $2}}'"))
-        memory = int(run_command(f"pct config {ctid} | grep memory | awk '{{print $2}}'"))
+        cores = int(snapshot["config"]["cores"])
+        memory = int(snapshot["config"]["memory"])
         settings = {"cores": cores, "memory": memory}
         backup_container_settings(ctid, settings)
         return {
-            "cpu": get_cpu_usage(ctid),
-            "mem": get_memory_usage(ctid),
+            "cpu": get_cpu_usage(ctid, snapshot),
+            "mem": get_memory_usage(ctid, snapshot),
             "initial_cores": cores,
             "initial_memory": memory,
         }
@@ -274,23 +1014,50 @@ def get_container_data(ctid):
         return None
 
 
-def collect_container_data():
-    """Collect data from all containers in parallel."""
-    containers = {}
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        future_to_ctid = {
-            executor.submit(get_container_data, ctid): ctid 
-            for ctid in get_containers()
-        }
-        for future in as_completed(future_to_ctid):
+def collect_in_parallel(func, ctids):
+    """Run func(ctid) for all containers concurrently, skipping ones past the deadline."""
+    ctids = list(ctids)
+    results = {}
+    if not ctids:
+        return results
+
+    workers = min(MAX_WORKERS, len(ctids))
+    # Remote commands share one pooled SSH transport, so respect its session limit
+    if config.get('DEFAULT', {}).get('use_remote_proxmox', False):
+        workers = min(workers, SSH_MAX_SESSIONS)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        future_to_ctid = {executor.submit(func, ctid): ctid for ctid in ctids}
+        done, not_done = wait(future_to_ctid, timeout=COLLECT_TIMEOUT)
+        for future in done:
             ctid = future_to_ctid[future]
             try:
                 data = future.result()
                 if data:
-                    containers[ctid] = data
-                    logging.debug("Container %s data: %s", ctid, data)
+                    results[ctid] = data
             except Exception as e:  # pylint: disable=broad-except
                 logging.error("Error retrieving data for %s: %s", ctid, str(e))
+        for future in not_done:
+            future.cancel()
+            logging.warning(
+                "Data collection for %s did not finish within %ds. Skipping.",
+                future_to_ctid[future], COLLECT_TIMEOUT
+            )
+    finally:
+        executor.shutdown(wait=False)
+    return results
+
+
+def collect_container_data():
+    """Collect data from all containers in parallel."""
+    ctids = get_containers()
+    snapshots = prefetch_container_snapshots(ctids)
+    containers = collect_in_parallel(
+        lambda ctid: get_container_data(ctid, snapshots.get(ctid)), ctids
+    )
+    for ctid, data in containers.items():
+        logging.debug("Container %s data: %s", ctid, data)
     return containers
 
 
@@ -301,11 +1068,18 @@ def prioritize_containers(containers):
         return []
 
     try:
-        priorities = sorted(
-            containers.items(),
-            key=lambda item: (item[1]['cpu'], item[1]['mem']),
-            reverse=True
-        )
+        if np is not None and len(containers) >= NUMPY_SORT_THRESHOLD:
+            items = list(containers.items())
+            cpus = np.fromiter((data['cpu'] for _, data in items), dtype=np.float64)
+            mems = np.fromiter((data['mem'] for _, data in items), dtype=np.float64)
+            # lexsort is stable and sorts by the last key first: CPU, then memory
+            priorities = [items[i] for i in np.lexsort((-mems, -cpus))]
+        else:
+            priorities = sorted(
+                containers.items(),
+                key=lambda item: (item[1]['cpu'], item[1]['mem']),
+                reverse=True
+            )
         logging.debug("Container priorities: %s", priorities)
         return priorities
     except Exception as e:  # pylint: disable=broad-except
@@ -315,7 +1089,7 @@ def prioritize_containers(containers):
 
 def get_container_config(ctid):
     """Get container tier configuration."""
-    return LXC_TIER_ASSOCIATIONS.get(ctid, DEFAULTS)
+    return LXC_TIER_ASSOCIATIONS.get(str(ctid), DEFAULTS)
 
 
 def generate_unique_snapshot_name(base_name):
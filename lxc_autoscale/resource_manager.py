@@ -5,57 +5,50 @@ import lxc_utils
 import scaling_manager
 import notification
 import paramiko
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import paramiko
 
 # Debug print statement to ensure paramiko is imported
 # print(f"Paramiko version: {paramiko.__version__}")
 
-def collect_data_for_container(ctid: str) -> dict:
+def collect_data_for_container(ctid: str, snapshot: dict = None) -> dict:
     """
     Collect resource usage data for a single LXC container.
 
     Args:
         ctid (str): The container ID.
+        snapshot (dict): A prefetched container snapshot, fetched on demand if omitted.
 
     Returns:
         dict: The data collected for the container, or None if the container is not running.
     """
-    if not lxc_utils.is_container_running(ctid):
+    if snapshot is None:
+        snapshot = lxc_utils.get_container_snapshot(ctid)
+    if not snapshot or not snapshot["running"]:
         return None
 
     logging.debug(f"Collecting data for container {ctid}...")
 
     try:
-        # Retrieve the current configuration of the container using Python string operations
-        config_output = lxc_utils.run_command(f"pct config {ctid}")
-        
+        # The snapshot already holds the parsed `pct config` output
+        config_values = snapshot["config"]
+
         # Initialize values for cores and memory
         cores = None
         memory = None
 
-        # Parse the config_output for cores and memory
-        for line in config_output.splitlines():
-            # Check if 'cores' and 'memory' exist and extract their values safely
-            if 'cores' in line:
-                try:
-                    cores_value = line.split()[1]
-                    if cores_value.isdigit():  # Ensure it's a valid integer string
-                        cores = int(cores_value)
-                    else:
-                        logging.warning(f"Invalid value for cores: {cores_value}")
-                except IndexError:
-                    logging.warning(f"Unable to extract cores value from line: {line}")
-            elif 'memory' in line:
-                try:
-                    memory_value = line.split()[1]
-                    if memory_value.isdigit():  # Ensure it's a valid integer string
-                        memory = int(memory_value)
-                    else:
-                        logging.warning(f"Invalid value for memory: {memory_value}")
-                except IndexError:
-                    logging.warning(f"Unable to extract memory value from line: {line}")
+        # Extract cores and memory, ensuring they are valid integer strings
+        cores_value = config_values.get('cores', '')
+        if cores_value.isdigit():
+            cores = int(cores_value)
+        else:
+            logging.warning(f"Invalid value for cores: {cores_value}")
+
+        memory_value = config_values.get('memory', '')
+        if memory_value.isdigit():
+            memory = int(memory_value)
+        else:
+            logging.warning(f"Invalid value for memory: {memory_value}")
 
         if cores is None or memory is None:
             raise ValueError(f"Failed to extract valid cores or memory values for container {ctid}")
@@ -68,8 +61,8 @@ def collect_data_for_container(ctid: str) -> dict:
         # Collect CPU and memory usage data
         return {
             ctid: {
-                "cpu": lxc_utils.get_cpu_usage(ctid),
-                "mem": lxc_utils.get_memory_usage(ctid),
+                "cpu": lxc_utils.get_cpu_usage(ctid, snapshot),
+                "mem": lxc_utils.get_memory_usage(ctid, snapshot),
                 "initial_cores": cores,
                 "initial_memory": memory,
             }
@@ -90,15 +83,14 @@ def collect_container_data() -> dict:
         dict: A dictionary where the keys are container IDs and the values are their respective data.
     """
     containers = {}
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futures = {executor.submit(collect_data_for_container, ctid): ctid for ctid in lxc_utils.get_containers()}
-        for future in as_completed(futures):
-            try:
-                container_data = future.result()
-                if container_data:
-                    containers.update(container_data)
-            except Exception as e:
-                logging.error(f"Error collecting data for a container: {e}")
+    ctids = lxc_utils.get_containers()
+    # When remote, fetch every snapshot up front over concurrent SSH channels
+    snapshots = lxc_utils.prefetch_container_snapshots(ctids)
+    results = lxc_utils.collect_in_parallel(
+        lambda ctid: collect_data_for_container(ctid, snapshots.get(ctid)), ctids
+    )
+    for container_data in results.values():
+        containers.update(container_data)
     return containers
 
 import time
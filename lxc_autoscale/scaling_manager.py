@@ -153,7 +153,7 @@ def adjust_resources(containers, energy_mode):
         energy_mode (bool): Flag to indicate if energy-saving adjustments should be made during off-peak hours.
     """
     logging.info("Starting resource allocation process...")
-    logging.info(f"Ignoring LXC Containers: {IGNORE_LXC}")
+    logging.info(f"Ignoring LXC Containers: {sorted(IGNORE_LXC)}")
 
     total_cores = get_total_cores()
     total_memory = get_total_memory()
@@ -187,7 +187,7 @@ def adjust_resources(containers, energy_mode):
 
     # Proceed with the rest of the logic for adjusting resources
     for ctid, usage in containers.items():
-        if ctid in IGNORE_LXC:
+        if is_ignored(ctid):
             logging.info(f"Container {ctid} is ignored. Skipping resource adjustment.")
             continue
 
@@ -357,6 +357,7 @@ def scale_out(group_name, group_config):
             # Start the new container
             run_command(f"pct start {new_ctid}")
             current_instances.append(new_ctid)
+            get_containers.cache_clear()  # The container list just changed
 
             # Update the configuration and tracking
             group_config['lxc_containers'] = set(map(str, current_instances))